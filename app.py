@@ -1,18 +1,164 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+import asyncio
+import orjson
+import os
+import dns.asyncresolver
 import dns.resolver
 import smtplib
-import re
+import secrets
 import socket
-from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import string
+import threading
+from bisect import bisect_left
+from collections import Counter, OrderedDict, defaultdict, deque
+from operator import attrgetter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
 import time
 
 app = Flask(__name__)
 CORS(app)
 
-# Timeout settings to prevent worker crashes
-SMTP_TIMEOUT = 8  # 8 seconds max per SMTP check
+
+class TTLCache:
+    """Thread-safe LRU of values that expire after a per-entry TTL.
+    
+    At most maxsize entries are kept (least recently used evicted first);
+    expired entries are dropped lazily when looked up.
+    """
+    
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Fresh value for key, or None"""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            if cached[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return cached[1]
+    
+    def put(self, key, value, ttl):
+        """Store value for ttl seconds"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+# Timeout settings to prevent worker crashes. The SMTP limits are absolute
+# deadlines covering slot wait, connect and every command/reply. The response
+# goes out by BATCH_TIMEOUT; a verification still running then stops by its
+# own DNS + port probe + SMTP_BUDGET (~50s worst case) and frees its slot.
+# Keep both under the gunicorn worker timeout (60s).
+SMTP_TIMEOUT = int(os.environ.get('SMTP_TIMEOUT', 30))    # max for one MX host (slow MX servers are common)
 DNS_TIMEOUT = 3   # 3 seconds max per DNS check
+SMTP_BUDGET = int(os.environ.get('SMTP_BUDGET', 40))      # max across all MX hosts of one email
+BATCH_TIMEOUT = int(os.environ.get('BATCH_TIMEOUT', 45))  # max before a request answers, however many emails
+
+# Identity presented to MX servers; set these to a domain you control, since
+# receivers increasingly reject probes claiming to come from freemail domains
+HELO_HOST = os.environ.get('HELO_HOST', 'example.com')
+MAIL_FROM = os.environ.get('MAIL_FROM', 'noreply@' + HELO_HOST)
+
+# Quick TCP probe of port 25 before SMTP (many networks block it outbound).
+# Answers (connected / refused) are remembered for PORT_PROBE_TTL; a timeout
+# may be one lost SYN, so it is only trusted for PORT_PROBE_TIMEOUT_TTL.
+PORT_PROBE_TIMEOUT = 2
+PORT_PROBE_TTL = 300
+PORT_PROBE_TIMEOUT_TTL = 30
+PORT_PROBE_CACHE_SIZE = 10000
+
+_port_status = TTLCache(PORT_PROBE_CACHE_SIZE)
+
+# Catch-all is a property of the domain: probe it once per hour, not per email
+CATCH_ALL_TTL = 3600
+CATCH_ALL_CACHE_SIZE = 10000
+
+_catch_all_cache = TTLCache(CATCH_ALL_CACHE_SIZE)
+
+# RCPT reply code -> mailbox exists; unlisted codes (4xx, 554 policy blocks) are unknown
+SMTP_CODE_POLICY = {
+    250: True,    # OK
+    251: True,    # user not local, will forward
+    550: False,   # mailbox unavailable
+    551: False,   # user not local
+    553: False,   # mailbox name not allowed
+}
+
+# SMTP pool limits: concurrent sessions per MX host, RCPT probes per session,
+# how long an idle session is kept (servers drop idle clients soon after),
+# and how often every host is swept for sessions past that age
+MAX_SMTP_PER_HOST = 5
+MAX_PROBES_PER_CONN = 100
+SMTP_MAX_IDLE = 100
+SMTP_SWEEP_INTERVAL = 10
+
+# Shared async resolver (coroutine-safe) so A and MX lookups can overlap.
+# Configured once at import; its own LRU cache also covers CNAME targets
+# and other names that never pass through the app-level cache below.
+RESOLVER = dns.asyncresolver.Resolver()
+RESOLVER.lifetime = DNS_TIMEOUT
+RESOLVER.cache = dns.resolver.LRUCache(1024)
+
+# Process-wide LRU of answers keyed by (domain, rdtype). Answers honor the
+# record TTL within bounds; definitive negatives (NXDOMAIN / no answer) are
+# kept briefly so typo domains don't each cost a round trip.
+DNS_CACHE_SIZE = 10000
+DNS_CACHE_MIN_TTL = 300
+DNS_CACHE_MAX_TTL = 3600
+DNS_NEGATIVE_TTL = 60
+
+_dns_cache = TTLCache(DNS_CACHE_SIZE)
+
+# Finished verifications keyed by normalized email, so clients re-polling the
+# same list skip DNS and SMTP. How long a verdict is trusted depends on it;
+# timeouts, errors and failed lookups are transient and never cached.
+RESULT_CACHE_SIZE = 10000
+RESULT_CACHE_TTL = {'valid': 86400, 'invalid': 3600, 'risky': 900}
+TRANSIENT_ISSUES = frozenset({'Verification timeout', 'DNS lookup failed', 'MX lookup failed'})
+
+_result_cache = TTLCache(RESULT_CACHE_SIZE)
+
+# Built once at import; checked for every email. issuperset() walks the string
+# in C, which beats a per-character Python loop (e.g. an int bitmap tested with
+# shifts) by 5x or more on typical addresses.
+EMAIL_LOCAL_CHARS = frozenset(string.ascii_letters + string.digits + '._%+-')
+EMAIL_DOMAIN_CHARS = frozenset(string.ascii_letters + string.digits + '.-')
+
+# Sorted tuple (compact, no per-call allocation) searched with bisect
+DISPOSABLE_DOMAINS_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'disposable_domains.txt'
+)
+
+with open(DISPOSABLE_DOMAINS_FILE) as f:
+    DISPOSABLE_DOMAINS = tuple(sorted(
+        line.strip().lower() for line in f
+        if line.strip() and not line.startswith('#')
+    ))
+
+ROLE_NAMES = frozenset({
+    'admin', 'info', 'support', 'sales', 'contact',
+    'help', 'office', 'hello', 'team', 'noreply', 'webmaster'
+})  # also matched as the first dotted label, e.g. sales.eu@
+
+# Large providers known to reject unknown mailboxes; no catch-all probe needed
+NON_CATCH_ALL_PROVIDERS = frozenset({
+    'gmail.com', 'googlemail.com', 'outlook.com', 'hotmail.com', 'live.com', 'msn.com'
+})
+
+# Minimum (clamped) score for each status; anything lower is invalid
+VALID_SCORE = 80
+RISKY_SCORE = 50
+
+# Score for an SMTP-accepted mailbox, the largest single bonus
+SMTP_ACCEPT_SCORE = 40
 
 # ═══════════════════════════════════════════════════════════════
 # MAIN VERIFICATION ENDPOINT
@@ -22,12 +168,16 @@ DNS_TIMEOUT = 3   # 3 seconds max per DNS check
 def verify_emails():
     """Verify multiple email addresses"""
     try:
-        data = request.get_json()
+        # orjson straight off the body: faster than get_json() and no cached copy
+        try:
+            data = orjson.loads(request.get_data(cache=False))
+        except orjson.JSONDecodeError:
+            return jsonify({'success': False, 'error': 'Invalid JSON'}), 400
         
         if not data:
             return jsonify({'success': False, 'error': 'No data provided'}), 400
         
-        if 'emails' not in data:
+        if not isinstance(data, dict) or 'emails' not in data:
             return jsonify({'success': False, 'error': 'Missing "emails" field'}), 400
         
         emails = data['emails']
@@ -42,40 +192,153 @@ def verify_emails():
         if len(emails) > 20:
             return jsonify({'success': False, 'error': 'Maximum 20 emails per request'}), 400
         
-        # Process emails with threading for speed
-        results = []
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = [executor.submit(verify_single_email, email.strip()) for email in emails]
-            for future in futures:
-                try:
-                    result = future.result(timeout=15)  # 15 sec max per email
-                    results.append(result)
-                except TimeoutError:
-                    results.append({
-                        'email': 'timeout',
-                        'status': 'invalid',
-                        'score': 0,
-                        'issues': ['Verification timeout'],
-                        'checks': {
-                            'syntax': False, 'dns': False, 'hasMX': False,
-                            'smtp': None, 'disposable': False, 'roleBased': False, 'catchAll': False
-                        }
-                    })
-        
-        return jsonify({'success': True, 'results': results}), 200
+        if not all(isinstance(email, str) for email in emails):
+            return jsonify({'success': False, 'error': 'Emails must be strings'}), 400
+        
+        # Verify each distinct address once (case-insensitive); each email is
+        # normalized once and its key reused for domains and replay, while
+        # every position is reported back with the caller's own spelling
+        spellings = [email.strip() for email in emails]
+        keys = [email.lower() for email in spellings]
+        unique = {}
+        for key, email in zip(keys, spellings):
+            unique.setdefault(key, email)
+        
+        # Recently verified addresses are answered from the result cache
+        verified = {}
+        misses = {}
+        for key, email in unique.items():
+            cached = cached_result(key)
+            if cached:
+                verified[key] = {**cached, 'email': email}
+            else:
+                misses[key] = email
+        
+        # Resolve each distinct domain once up front, all on one event loop,
+        # so emails sharing a domain don't race into duplicate lookups
+        domains = set()
+        for key, email in misses.items():
+            domain = key.rpartition('@')[2]
+            if valid_syntax(email) and not is_disposable(domain):
+                domains.add(domain)
+        
+        dns_answers = asyncio.run(resolve_domains(domains)) if domains else {}
+        
+        # One thread per distinct email: the work is socket-bound, and
+        # SMTPPool already caps how many of them share one MX host
+        executor = ThreadPoolExecutor(max_workers=min(len(misses), 20) or 1)
+        futures = {
+            key: executor.submit(verify_single_email, email, dns_answers)
+            for key, email in misses.items()
+        }
+        deadline = time.monotonic() + BATCH_TIMEOUT
+        
+        # Clients that ask for NDJSON (Accept header, or ?stream=1 where headers
+        # are awkward to set) get each result as soon as it completes
+        wants_ndjson = request.args.get('stream') in ('1', 'true') or (
+            request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+            == 'application/x-ndjson'
+        )
+        
+        if wants_ndjson:
+            return Response(
+                stream_with_context(stream_results(keys, spellings, unique, verified, futures, executor, deadline)),
+                mimetype='application/x-ndjson'
+            )
+        
+        # Wait on all emails at once, so the batch (not each email) gets the budget
+        try:
+            verified.update(completed_results(futures, unique, deadline))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        # Replay results in the original order, duplicates included
+        results = [
+            {**verified[key], 'email': email}
+            for key, email in zip(keys, spellings)
+        ]
+        
+        return app.response_class(
+            orjson.dumps({'success': True, 'results': results}),
+            mimetype='application/json'
+        )
     
     except Exception as e:
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
 
+def stream_results(keys, spellings, unique, verified, futures, executor, deadline):
+    """Yield an NDJSON line per input email in completion order, then totals.
+    
+    keys are the normalized input emails in request order and spellings the
+    emails as the caller wrote them (stripped); verified holds results
+    already known (cache hits), which go first. Each line is a result plus
+    its 'index' in the request; the last line is
+    {'done': true, 'total': ..., 'valid': ..., 'risky': ..., 'invalid': ...}.
+    """
+    positions = defaultdict(list)
+    for index, key in enumerate(keys):
+        positions[key].append(index)
+    
+    totals = {'valid': 0, 'risky': 0, 'invalid': 0}
+    
+    def lines(key, result):
+        for index in positions[key]:
+            totals[result['status']] += 1
+            yield orjson.dumps({'index': index, **result, 'email': spellings[index]}) + b'\n'
+    
+    try:
+        for key, result in verified.items():
+            yield from lines(key, result)
+        
+        for key, result in completed_results(futures, unique, deadline):
+            yield from lines(key, result)
+        
+        yield orjson.dumps({'done': True, 'total': len(keys), **totals}) + b'\n'
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def completed_results(futures, unique, deadline):
+    """Yield (key, result) as verifications finish, then a timeout result
+    for each one still running at the batch deadline"""
+    pending = {future: key for key, future in futures.items()}
+    
+    try:
+        for future in as_completed(pending, timeout=max(0, deadline - time.monotonic())):
+            key, result = pending.pop(future), future.result()
+            remember_result(key, result)
+            yield key, result
+    except TimeoutError:
+        pass
+    
+    for key in pending.values():
+        result = new_result(unique[key])
+        result['issues'].append('Verification timeout')
+        yield key, result
+
+
+def cached_result(key):
+    """Fresh cached verification for a normalized email, or None"""
+    return _result_cache.get(key)
+
+
+def remember_result(key, result):
+    """Cache a finished verification for its status's TTL, unless transient"""
+    for issue in result['issues']:
+        if issue in TRANSIENT_ISSUES or issue.startswith('Error:'):
+            return
+    
+    _result_cache.put(key, result, RESULT_CACHE_TTL[result['status']])
+
+
 # ═══════════════════════════════════════════════════════════════
 # EMAIL VERIFICATION LOGIC (OPTIMIZED)
 # ═══════════════════════════════════════════════════════════════
 
-def verify_single_email(email):
-    """Verify a single email with timeout protection"""
-    
-    result = {
+def new_result(email):
+    """Result skeleton shared by every verification outcome"""
+    return {
         'email': email,
         'status': 'invalid',
         'score': 0,
@@ -85,115 +348,525 @@ def verify_single_email(email):
             'smtp': None, 'disposable': False, 'roleBased': False, 'catchAll': False
         }
     }
+
+
+def verify_single_email(email, dns_answers=None):
+    """Verify a single email with timeout protection.
+    
+    dns_answers optionally maps lowercased domains to prefetched
+    lookup_domain() results; other domains are resolved here.
+    """
+    
+    result = new_result(email)
     
     try:
         # 1. SYNTAX CHECK
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, email):
+        if not valid_syntax(email):
             result['issues'].append('Invalid format')
             return result
         
         result['checks']['syntax'] = True
         result['score'] += 20
         
-        local_part = email.split('@')[0]
-        domain = email.split('@')[1]
+        local_part, _, domain = email.rpartition('@')
         
-        # 2. DNS CHECK (with timeout)
-        try:
-            dns.resolver.resolve(domain, 'A', lifetime=DNS_TIMEOUT)
-            result['checks']['dns'] = True
-            result['score'] += 15
-        except:
-            result['issues'].append('Domain not found')
+        domain_lower = domain.lower()
+        
+        # 2. DISPOSABLE CHECK (local, so a throwaway domain never costs DNS/SMTP)
+        if is_disposable(domain_lower):
+            result['checks']['disposable'] = True
+            result['issues'].append('Disposable email')
+            result['score'] = 0
             return result
         
-        # 3. MX CHECK (with timeout)
-        try:
-            mx_records = dns.resolver.resolve(domain, 'MX', lifetime=DNS_TIMEOUT)
-            if mx_records:
-                result['checks']['hasMX'] = True
-                result['score'] += 15
-                mx_host = str(sorted(mx_records, key=lambda r: r.preference)[0].exchange).rstrip('.')
-            else:
-                result['issues'].append('No MX records')
-                return result
-        except:
-            result['issues'].append('MX lookup failed')
+        # MX lookup, with an A fallback only when MX fails (each bounded by DNS_TIMEOUT)
+        answers = dns_answers.get(domain_lower) if dns_answers else None
+        a_records, mx_records = answers or lookup_domain(domain_lower)
+        
+        # 3. DNS CHECK (only a definitive negative means the domain is gone)
+        if isinstance(a_records, (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)):
+            result['issues'].append('Domain not found')
             return result
         
-        # 4. SMTP CHECK (with strict timeout)
-        smtp_result = check_smtp_fast(mx_host, email)
-        result['checks']['smtp'] = smtp_result
+        if isinstance(a_records, Exception):
+            result['issues'].append('DNS lookup failed')  # Timeout / server failure
+            return result
         
-        if smtp_result == True:
-            result['score'] += 40
-        elif smtp_result == False:
-            result['issues'].append('Mailbox not found')
-        else:
-            result['score'] += 10  # Unknown
+        result['checks']['dns'] = True
+        result['score'] += 15
         
-        # 5. DISPOSABLE CHECK
-        disposable_domains = [
-            'tempmail.com', 'guerrillamail.com', '10minutemail.com',
-            'throwaway.email', 'mailinator.com', 'maildrop.cc',
-            'temp-mail.org', 'getnada.com', 'trashmail.com'
-        ]
+        # 4. MX CHECK (dnspython raises NoAnswer rather than returning no records)
+        if isinstance(mx_records, dns.resolver.NoAnswer):
+            result['issues'].append('No MX records')
+            return result
         
-        if domain.lower() in disposable_domains:
-            result['checks']['disposable'] = True
-            result['issues'].append('Disposable email')
-            result['score'] -= 20
+        if isinstance(mx_records, Exception):
+            result['issues'].append('MX lookup failed')  # Timeout / server failure
+            return result
         
-        # 6. ROLE-BASED CHECK
-        role_names = [
-            'admin', 'info', 'support', 'sales', 'contact',
-            'help', 'office', 'hello', 'team', 'noreply', 'webmaster'
-        ]
+        result['checks']['hasMX'] = True
+        result['score'] += 15
+        mx_hosts = mx_hosts_by_preference(mx_records)
         
-        if local_part.lower() in role_names:
+        # 5. ROLE-BASED CHECK (local, so it's settled before paying for SMTP)
+        if local_part.lower().partition('.')[0] in ROLE_NAMES:
             result['checks']['roleBased'] = True
             result['issues'].append('Role-based email')
             result['score'] -= 10
         
-        # FINAL STATUS
-        result['score'] = max(0, min(100, result['score']))
+        # Skip SMTP when even an accepted mailbox couldn't reach risky
+        if result['score'] + SMTP_ACCEPT_SCORE < RISKY_SCORE:
+            return finalize_status(result)
+        
+        # 6. SMTP CHECK (with strict timeout, pooled per MX host)
+        smtp_result, catch_all = check_smtp_fast(mx_hosts, email)
+        result['checks']['smtp'] = smtp_result
+        result['checks']['catchAll'] = catch_all
         
-        if result['score'] >= 80:
-            result['status'] = 'valid'
-        elif result['score'] >= 50:
-            result['status'] = 'risky'
+        if catch_all:
+            result['issues'].append('Catch-all domain')
+            result['score'] += 10  # Accepted, but so is any address
+        elif smtp_result == True:
+            result['score'] += SMTP_ACCEPT_SCORE
+        elif smtp_result == False:
+            result['issues'].append('Mailbox not found')
         else:
-            result['status'] = 'invalid'
+            result['score'] += 10  # Unknown
         
-        return result
+        return finalize_status(result)
         
     except Exception as e:
         result['issues'].append(f'Error: {str(e)}')
         return result
 
 
-def check_smtp_fast(mx_host, email):
-    """Fast SMTP check with strict timeout"""
+def finalize_status(result):
+    """Clamp the score to 0-100 and derive the status from it"""
+    result['score'] = max(0, min(100, result['score']))
+    
+    if result['score'] >= VALID_SCORE:
+        result['status'] = 'valid'
+    elif result['score'] >= RISKY_SCORE:
+        result['status'] = 'risky'
+    else:
+        result['status'] = 'invalid'
+    
+    return result
+
+
+def mx_hosts_by_preference(mx_records):
+    """MX hostnames, best preference first.
+    
+    The primary comes from a single min() pass; backups are only sorted
+    if the SMTP check actually falls back to them.
+    """
+    primary = min(mx_records, key=attrgetter('preference'))
+    yield str(primary.exchange).rstrip('.')
+    
+    backups = sorted((r for r in mx_records if r is not primary), key=attrgetter('preference'))
+    for record in backups:
+        yield str(record.exchange).rstrip('.')
+
+
+def valid_syntax(email):
+    """Hand-rolled syntax check: local@label(.label)*.tld, TLD 2+ ASCII letters"""
+    local_part, at, domain = email.rpartition('@')
+    if not at or not local_part or not EMAIL_LOCAL_CHARS.issuperset(local_part):
+        return False
+    
+    host, dot, tld = domain.rpartition('.')
+    if len(tld) < 2 or not (tld.isascii() and tld.isalpha()):
+        return False
+    
+    # Every label non-empty: no leading, trailing or doubled dots
+    return (
+        bool(host) and EMAIL_DOMAIN_CHARS.issuperset(host)
+        and host[0] != '.' and host[-1] != '.' and '..' not in host
+    )
+
+
+def is_disposable(domain):
+    """Binary search of the sorted disposable-domain blocklist"""
+    i = bisect_left(DISPOSABLE_DOMAINS, domain)
+    return i < len(DISPOSABLE_DOMAINS) and DISPOSABLE_DOMAINS[i] == domain
+
+
+def lookup_domain(domain):
+    """(A, MX) answers for a domain; failures are returned, not raised.
+    A is None when an MX answer already proves the domain exists."""
+    domain = domain.lower()
+    
+    # A cached MX answer settles it without touching the event loop
+    mx_records = _dns_cache.get((domain, 'MX'))
+    if mx_records is not None and not isinstance(mx_records, Exception):
+        return None, mx_records
+    
+    return asyncio.run(resolve_domain(domain))
+
+
+async def resolve_domains(domains):
+    """Resolve many domains concurrently: {domain: (A, MX)}"""
+    domains = list(domains)
+    answers = await asyncio.gather(*(resolve_domain(domain) for domain in domains))
+    return dict(zip(domains, answers))
+
+
+async def resolve_domain(domain):
+    """MX first through the DNS cache; A only when MX can't vouch for the domain"""
+    mx_records = await cached_resolve(domain, 'MX')
+    if not isinstance(mx_records, Exception):
+        return None, mx_records
+    
+    # NXDOMAIN already answers the A question too
+    if isinstance(mx_records, dns.resolver.NXDOMAIN):
+        return mx_records, mx_records
+    
+    # NoAnswer/timeouts: an A record separates "no mail" from "no domain"
+    return await cached_resolve(domain, 'A'), mx_records
+
+
+async def cached_resolve(domain, rdtype):
+    """One cached lookup: the answer, or the exception that ended it"""
+    key = (domain, rdtype)
+    cached = _dns_cache.get(key)
+    if cached is not None:
+        return cached
+    
     try:
-        smtp = smtplib.SMTP(timeout=SMTP_TIMEOUT)
-        smtp.connect(mx_host, 25)
-        smtp.helo('gmail.com')
-        smtp.mail('verify@gmail.com')
-        code, msg = smtp.rcpt(email)
-        smtp.quit()
-        
-        if code == 250:
-            return True
-        elif code == 550:
-            return False
+        answer = await RESOLVER.resolve(domain, rdtype)
+        ttl = max(DNS_CACHE_MIN_TTL, min(DNS_CACHE_MAX_TTL, answer.rrset.ttl))
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
+        answer, ttl = e, DNS_NEGATIVE_TTL
+    except Exception as e:
+        return e  # Timeouts and server failures are never cached
+    
+    _dns_cache.put(key, answer, ttl)
+    return answer
+
+
+def check_smtp_fast(mx_hosts, email):
+    """Fast SMTP check, falling back through MX hosts in preference order.
+    
+    Stops at the first definitive answer. All attempts share one absolute
+    deadline (SMTP_BUDGET, and at most SMTP_TIMEOUT per host) that every
+    connect, command and reply below is held to, so a slow or dead MX
+    can't stretch a probe past the budget.
+    """
+    deadline = time.monotonic() + SMTP_BUDGET
+    
+    for mx_host in mx_hosts:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        
+        # A pooled session already proves the port is reachable
+        if not smtp_pool.has_idle(mx_host) and not port_open(
+            mx_host, timeout=min(PORT_PROBE_TIMEOUT, remaining)
+        ):
+            continue
+        
+        host_deadline = min(deadline, time.monotonic() + SMTP_TIMEOUT)
+        exists, catch_all = probe_mx_host(mx_host, email, host_deadline)
+        if exists is not None:
+            return exists, catch_all
+    
+    return None, False
+
+
+def time_left(deadline):
+    """Seconds until deadline, raising TimeoutError once it has passed"""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError('SMTP deadline passed')
+    return remaining
+
+
+def port_open(host, port=25, timeout=PORT_PROBE_TIMEOUT):
+    """Raw TCP connect check, memoized per host so dead ports are probed once"""
+    key = (host, port)
+    
+    cached = _port_status.get(key)
+    if cached is not None:
+        return cached
+    
+    ttl = PORT_PROBE_TTL
+    try:
+        with socket.create_connection((host, port), timeout):
+            is_open = True
+    except ConnectionRefusedError:
+        is_open = False
+    except OSError:
+        is_open, ttl = False, PORT_PROBE_TIMEOUT_TTL  # Timeouts, unreachable networks
+    
+    _port_status.put(key, is_open, ttl)
+    return is_open
+
+
+def probe_mx_host(mx_host, email, deadline):
+    """Probe one MX host over a pooled session.
+    
+    Returns (exists, catch_all). Unless the domain's catch-all status is
+    already known, a random address on the same domain is probed in the
+    same envelope to detect catch-all servers without a second session.
+    Nothing waits past deadline (a time.monotonic() value).
+    """
+    domain = email.rpartition('@')[2].lower()
+    
+    try:
+        for attempt in range(2):
+            smtp = smtp_pool.acquire(mx_host, deadline)
+            reused = smtp.probe_count > 0
+            healthy = False
+            exists, catch_all = None, False
+            try:
+                catch_all = cached_catch_all(domain)
+                recipients = [email]
+                if catch_all is None:
+                    recipients.append(f"nonexistent-{secrets.token_hex(8)}@{domain}")
+                
+                exists, *random_probe = rcpt_probe(smtp, recipients)
+                if random_probe and random_probe[0] is not None:
+                    catch_all = random_probe[0]
+                    remember_catch_all(domain, catch_all)
+                
+                catch_all = bool(exists and catch_all)
+                healthy = True
+                break
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                # Pooled session went stale; retry once on a fresh connection.
+                # A fresh session failing (smtplib reports timeouts this way too)
+                # is final, and the retry only gets what's left until deadline.
+                if not reused or time.monotonic() >= deadline:
+                    return None, False
+                continue
+            finally:
+                smtp_pool.release(mx_host, smtp, healthy)
         else:
-            return None
+            return None, False
+        
+        return exists, catch_all
             
-    except socket.timeout:
-        return None
-    except:
-        return None
+    except Exception:
+        return None, False
+
+
+def cached_catch_all(domain):
+    """Catch-all status from an earlier probe, or None if unknown/expired"""
+    if domain in NON_CATCH_ALL_PROVIDERS:
+        return False
+    return _catch_all_cache.get(domain)
+
+
+def remember_catch_all(domain, catch_all):
+    """Cache a definitive catch-all probe result for CATCH_ALL_TTL"""
+    _catch_all_cache.put(domain, catch_all, CATCH_ALL_TTL)
+
+
+def rcpt_probe(smtp, recipients):
+    """MAIL FROM + RCPT TO per recipient on an open session, then RSET.
+    
+    Returns SMTP_CODE_POLICY verdicts (True/False/None) in recipient order.
+    If the server offers ESMTP PIPELINING, every command is written at once
+    and the exchange costs one round trip. Otherwise commands go one at a
+    time and stop at the first recipient that isn't accepted.
+    
+    Replies are awaited only until smtp.deadline. Once it has passed, the
+    verdicts so far are returned, remaining recipients (such as the
+    catch-all probe) are skipped, and the session is closed instead of reset.
+    """
+    pipelining = smtp.has_extn('pipelining')
+    if pipelining:
+        commands = [f'MAIL FROM:<{MAIL_FROM}>']
+        commands += [f'RCPT TO:<{recipient}>' for recipient in recipients]
+        commands.append('RSET')
+        smtp.send(''.join(command + '\r\n' for command in commands))
+        smtp.getreply()  # MAIL FROM
+    else:
+        smtp.mail(MAIL_FROM)
+    
+    verdicts = []
+    for recipient in recipients:
+        if verdicts and time.monotonic() >= smtp.deadline:
+            break
+        try:
+            code, msg = smtp.getreply() if pipelining else smtp.rcpt(recipient)
+        except (smtplib.SMTPServerDisconnected, TimeoutError):
+            if not verdicts:
+                raise
+            break  # Keep the verdicts we have; the session is dropped below
+        verdicts.append(SMTP_CODE_POLICY.get(code))
+        if verdicts[-1] is not True and not pipelining:
+            break
+    
+    # Out of time (or disconnected): replies may still be in flight, so the
+    # session can't be reused; release() discards closed sessions
+    if smtp.sock is None or time.monotonic() >= smtp.deadline:
+        smtp.close()
+    elif pipelining:
+        smtp.getreply()  # RSET
+    else:
+        smtp.rset()
+    return verdicts
+
+
+# ═══════════════════════════════════════════════════════════════
+# SMTP CONNECTION POOL
+# ═══════════════════════════════════════════════════════════════
+
+class DeadlineSMTP(smtplib.SMTP):
+    """smtplib.SMTP that never waits on its socket past self.deadline.
+    
+    Connect, every command and every reply get only what is left until the
+    deadline (set each time the pool lends the session out), so one
+    exchange can't add up several full timeouts.
+    """
+    
+    deadline = 0
+    
+    def _get_socket(self, host, port, timeout):
+        return super()._get_socket(host, port, time_left(self.deadline))
+    
+    def send(self, s):
+        if self.sock:
+            self.sock.settimeout(time_left(self.deadline))
+        super().send(s)
+    
+    def getreply(self):
+        if self.sock:
+            self.sock.settimeout(time_left(self.deadline))
+        return super().getreply()
+
+
+class SMTPPool:
+    """Keeps SMTP sessions open per MX host so RCPT probes skip TCP + HELO"""
+    
+    def __init__(self, max_connections_per_host=MAX_SMTP_PER_HOST,
+                 max_probes_per_conn=MAX_PROBES_PER_CONN, max_idle=SMTP_MAX_IDLE):
+        self.max_connections_per_host = max_connections_per_host
+        self.max_probes_per_conn = max_probes_per_conn
+        self.max_idle = max_idle
+        # Per host: idle sessions (oldest first), a slot semaphore, and how many
+        # threads hold or await a slot. All three are guarded by _lock, so hosts
+        # nobody uses any more can be forgotten safely.
+        self._idle = defaultdict(deque)
+        self._slots = {}
+        self._users = Counter()
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + SMTP_SWEEP_INTERVAL
+    
+    def acquire(self, mx_host, deadline):
+        """Borrow a session to mx_host, blocking while the host is at its limit.
+        Waiting for a slot, connecting and the session's own I/O all count
+        against the same deadline."""
+        with self._lock:
+            slot = self._slots.get(mx_host)
+            if slot is None:
+                slot = self._slots[mx_host] = threading.BoundedSemaphore(self.max_connections_per_host)
+            self._users[mx_host] += 1
+        
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not slot.acquire(timeout=remaining):
+            self._leave(mx_host)
+            raise TimeoutError(f'No free SMTP slot for {mx_host}')
+        
+        # Newest session first; if even that one is stale, the sweep gets the rest
+        with self._lock:
+            idle = self._idle.get(mx_host)
+            smtp = idle.pop() if idle else None
+        
+        if smtp is not None:
+            if time.monotonic() - smtp.released_at < self.max_idle:
+                smtp.deadline = deadline
+                return smtp
+            smtp.close()  # Likely dropped server-side; don't wait on QUIT
+        
+        try:
+            return self._connect(mx_host, deadline)
+        except:
+            slot.release()
+            self._leave(mx_host)
+            raise
+    
+    def release(self, mx_host, smtp, healthy=True):
+        """Return a session (envelope already reset) to the pool, or close it"""
+        smtp.probe_count += 1
+        try:
+            if not healthy or smtp.sock is None:
+                smtp.close()  # Peer stalled or dropped; QUIT would wait out another timeout
+            elif smtp.probe_count < self.max_probes_per_conn:
+                smtp.released_at = time.monotonic()
+                with self._lock:
+                    self._idle[mx_host].append(smtp)
+            else:
+                self._close(smtp)
+        except Exception:
+            smtp.close()
+        finally:
+            self._slots[mx_host].release()
+            self._leave(mx_host)
+            self._sweep()
+    
+    def has_idle(self, mx_host):
+        """Whether a pooled session to mx_host is waiting to be reused"""
+        with self._lock:
+            return bool(self._idle.get(mx_host))
+    
+    def _leave(self, mx_host):
+        """Drop a thread's claim on mx_host; forget the host once nothing is left"""
+        with self._lock:
+            self._users[mx_host] -= 1
+            if self._users[mx_host] <= 0:
+                del self._users[mx_host]
+                if not self._idle.get(mx_host):
+                    self._idle.pop(mx_host, None)
+                    del self._slots[mx_host]
+    
+    def _sweep(self):
+        """Close idle sessions past max_idle on every host, at most once per
+        SMTP_SWEEP_INTERVAL, so hosts never contacted again don't keep sockets"""
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + SMTP_SWEEP_INTERVAL
+            
+            for mx_host, idle in list(self._idle.items()):
+                while idle and now - idle[0].released_at >= self.max_idle:
+                    stale.append(idle.popleft())
+                if not idle:
+                    del self._idle[mx_host]
+                    if mx_host not in self._users:
+                        del self._slots[mx_host]
+        
+        for smtp in stale:
+            smtp.close()
+    
+    def _connect(self, mx_host, deadline):
+        smtp = DeadlineSMTP()
+        smtp.deadline = deadline
+        try:
+            smtp.connect(mx_host, 25)
+            # EHLO advertises extensions (PIPELINING); fall back for old servers
+            code, msg = smtp.ehlo(HELO_HOST)
+            if code != 250:
+                smtp.helo(HELO_HOST)
+        except:
+            smtp.close()
+            raise
+        smtp.probe_count = 0
+        return smtp
+    
+    @staticmethod
+    def _close(smtp):
+        """Retire a healthy session politely with QUIT"""
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+
+smtp_pool = SMTPPool()
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -225,7 +898,7 @@ def home():
 # RUN SERVER
 # ═══════════════════════════════════════════════════════════════
 
+# Local debugging only; deployments run under gunicorn (see gunicorn.conf.py)
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 10000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,14 @@
+# Gunicorn settings shared by every deploy target (Dockerfile, render.yaml).
+# Run locally with: gunicorn -c gunicorn.conf.py app:app
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+
+# Threaded workers: requests spend their time waiting on DNS/SMTP sockets, and
+# each worker keeps its DNS cache, SMTP pool and result cache warm between them
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = 16
+
+# Must stay above BATCH_TIMEOUT in app.py so a slow batch still gets answered
+timeout = 60